@@ -5,8 +5,17 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "miran_search.settings")
 django.setup()
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 
 User = get_user_model()
-if not User.objects.filter(username="testuser").exists():
-    User.objects.create_superuser("testuser", "admin@example.com", "testpass")
-    
\ No newline at end of file
+# Idempotent and safe when several containers start at once: get_or_create falls back
+# to a lookup on a concurrent IntegrityError, and the password is only hashed on create.
+User.objects.get_or_create(
+    username="testuser",
+    defaults={
+        "email": "admin@example.com",
+        "is_staff": True,
+        "is_superuser": True,
+        "password": lambda: make_password("testpass"),
+    },
+)
@@ -68,6 +68,11 @@ WSGI_APPLICATION = 'miran_search.wsgi.application'
 DATABASE_URL = config('DATABASE_URL')
 parsed_db = urlparse(DATABASE_URL)
 
+# Word similarity a product column needs to enter the product search with
+# `%>`. 0.5 keeps misspelled words inside longer names ("Aple" in "Natural
+# Apple Development" scores 0.57) while the GIN trigram indexes can still prune.
+SEARCH_WORD_SIMILARITY_THRESHOLD = 0.5
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -76,6 +81,10 @@ DATABASES = {
         'PASSWORD': parsed_db.password,
         'HOST': parsed_db.hostname,
         'PORT': parsed_db.port or 5432,
+        # Sent at connect time, so setting it costs no extra query
+        'OPTIONS': {
+            'options': f'-c pg_trgm.word_similarity_threshold={SEARCH_WORD_SIMILARITY_THRESHOLD}',
+        },
     }
 }
 
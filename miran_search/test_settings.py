@@ -0,0 +1,12 @@
+"""
+Settings used by the test suite.
+
+Extends the project settings with a fast password hasher so creating test
+users does not pay for a full PBKDF2 hash each time.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+]
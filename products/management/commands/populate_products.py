@@ -3,19 +3,197 @@ Django Management Command to populate the database with test product data.
 
 This command generates and inserts a specified number of Product instances with
 highly diverse product names in a mix of Arabic and English using predefined words,
-Faker, and uniqueness checks. It uses bulk_create with batch processing for efficient
-insertion of large datasets. Progress is displayed using tqdm. Search functionality
-relies on TrigramSimilarity with pg_trgm extension.
+Faker, and uniqueness checks. Rows are streamed into PostgreSQL with COPY FROM STDIN
+in batches, bypassing the ORM for efficient insertion of large datasets. Progress is
+displayed using tqdm. Search functionality relies on TrigramSimilarity with pg_trgm
+extension.
 """
 
+import collections
+import functools
+import io
+import itertools
+import multiprocessing
 import random
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.postgres.indexes import GinIndex
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
 from faker import Faker
 from tqdm import tqdm
 from products.models import Product, Category
 from django.utils.text import slugify
 
+# Product columns written by COPY, in the order each row tuple is built
+COPY_COLUMNS = (
+    "name",
+    "brand",
+    "description",
+    "calories",
+    "protein",
+    "carbs",
+    "fats",
+    "category_id",
+    "created_at",
+    "updated_at",
+)
+
+# Characters that must be escaped in COPY's TEXT format
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+# Number of Faker values generated per locale. Words feed unique product names and
+# need the most variety; a small ring of brands and descriptions is enough for test data.
+WORD_POOL_SIZE = 10000
+BRAND_POOL_SIZE = 500
+DESCRIPTION_POOL_SIZE = 1000
+
+# Extra candidate names drawn so that duplicates can be dropped without a retry loop
+NAME_OVERSAMPLE = 1.05
+
+# Number of candidate names checked against the database per query
+EXISTING_NAMES_CHUNK = 10000
+
+# Batches submitted per worker process before the oldest one is copied
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+
+def sample_names(k, adjectives, nouns, words):
+    """Draw k "<adjective> <noun> <Word>" product names in bulk with random.choices."""
+    return [
+        f"{adjective} {noun} {word}"
+        for adjective, noun, word in zip(
+            random.choices(adjectives, k=k),
+            random.choices(nouns, k=k),
+            random.choices(words, k=k),
+        )
+    ]
+
+
+def find_existing_names(names):
+    """
+    Return the subset of names already stored, checking EXISTING_NAMES_CHUNK names per query.
+
+    Each chunk is bound as a single array parameter (name = ANY(%s)) instead of
+    an IN list with one placeholder per name.
+    """
+    sql = "SELECT name FROM {table} WHERE name = ANY(%s)".format(
+        table=connection.ops.quote_name(Product._meta.db_table)
+    )
+    existing = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(names), EXISTING_NAMES_CHUNK):
+            cursor.execute(sql, [names[start:start + EXISTING_NAMES_CHUNK]])
+            existing.update(name for (name,) in cursor.fetchall())
+    return existing
+
+
+def unique_names(k, adjectives, nouns, words, pending=frozenset(), serial=None):
+    """
+    Return k distinct product names that are neither stored yet nor in pending.
+
+    Candidates are oversampled and de-duplicated in bulk, then checked against the
+    database; any remaining shortfall is topped up with numbered
+    "<adjective> <noun> <n>" names, drawing n from serial when given.
+    """
+    candidates = list(dict.fromkeys(
+        sample_names(int(k * NAME_OVERSAMPLE) + 1, adjectives, nouns, words)
+    ))
+    taken = find_existing_names(candidates)
+    names = [name for name in candidates if name not in taken and name not in pending][:k]
+    if serial is None:
+        serial = itertools.count(2)
+    while len(names) < k:
+        fallbacks = [
+            f"{random.choice(adjectives)} {random.choice(nouns)} {next(serial)}"
+            for _ in range(k - len(names))
+        ]
+        taken = find_existing_names(fallbacks)
+        names.extend(name for name in fallbacks if name not in taken and name not in pending)
+    return names
+
+
+def build_faker_pools(fake, count):
+    """
+    Generate capitalized words, company names and sentences for one Faker locale.
+
+    No pool is larger than count, so small runs do not pay for unused values.
+    """
+    # Resolve provider methods once; every attribute access on Faker goes through its proxy
+    company = fake.company
+    sentence = fake.sentence
+    count = max(count, 1)
+    return (
+        [word.capitalize() for word in fake.words(nb=min(WORD_POOL_SIZE, count))],
+        [company() for _ in range(min(BRAND_POOL_SIZE, count))],
+        [sentence(nb_words=10) for _ in range(min(DESCRIPTION_POOL_SIZE, count))],
+    )
+
+
+def format_copy_row(values):
+    """Render a row tuple as a single tab-separated line for COPY ... FORMAT TEXT."""
+    return "\t".join(str(value).translate(COPY_ESCAPES) for value in values) + "\n"
+
+
+def sample_rows(k, vocabulary, pending, serial):
+    """
+    Return an iterator of k (name, brand, description) tuples for one locale.
+
+    vocabulary is (adjectives, nouns, words, brands, descriptions).
+    """
+    adjectives, nouns, words, brands, descriptions = vocabulary
+    return zip(
+        unique_names(k, adjectives, nouns, words, pending, serial),
+        random.choices(brands, k=k),
+        random.choices(descriptions, k=k),
+    )
+
+
+def generate_batches(count, batch_size, arabic, english, category_ids, in_flight):
+    """
+    Yield lists of up to batch_size (name, brand, description, calories, category_id) rows.
+
+    Every value is sampled batch by batch, so memory grows with batch_size rather than
+    count. Names are checked against the database and against the names of the last
+    in_flight batches, which may not have been copied yet.
+    """
+    recent_names = collections.deque(maxlen=in_flight)
+    serial = itertools.count(2)  # Shared, so numbered names do not restart per batch
+    for start in range(0, count, batch_size):
+        k = min(batch_size, count - start)
+        languages = random.choices([True, False], k=k)
+        arabic_count = sum(languages)
+        pending = set().union(*recent_names)
+        arabic_rows = sample_rows(arabic_count, arabic, pending, serial)
+        english_rows = sample_rows(k - arabic_count, english, pending, serial)
+        batch = [
+            (*next(arabic_rows if is_arabic else english_rows), row_calories, category_id)
+            for is_arabic, category_id, row_calories in zip(
+                languages,
+                random.choices(category_ids, k=k),
+                random.choices(range(10, 501), k=k),
+            )
+        ]
+        recent_names.append({name for name, *_ in batch})
+        yield batch
+
+
+def format_copy_batch(rows, now, sql_batch_size):
+    """
+    Render a batch of generated rows as COPY payloads of at most sql_batch_size lines.
+
+    This is pure string work with no database access, so it can run in worker processes.
+    """
+    lines = [
+        # Column order matches COPY_COLUMNS
+        format_copy_row((name, brand, description, calories, 0.0, 0.0, 0.0, category_id, now, now))
+        for name, brand, description, calories, category_id in rows
+    ]
+    return [
+        "".join(lines[start:start + sql_batch_size])
+        for start in range(0, len(lines), sql_batch_size)
+    ]
+
 
 class Command(BaseCommand):
     """Command to populate the database with test products."""
@@ -34,15 +212,105 @@ class Command(BaseCommand):
             "--batch-size",
             type=int,
             default=10000,
-            help="Batch size for bulk_create (default: 10000)",
+            help="Number of rows generated before they are sent to the database (default: 10000)",
+        )
+        parser.add_argument(
+            "--sql-batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows streamed per COPY statement (default: 1000)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Seed Faker and random for reproducible data (default: unseeded)",
+        )
+        parser.add_argument(
+            "--rebuild-indexes",
+            "--fast",
+            dest="rebuild_indexes",
+            action="store_true",
+            help=(
+                "Drop the trigram GIN indexes before loading and recreate them afterwards. "
+                "Faster for large loads, but locks the products table until the command finishes."
+            ),
+        )
+        parser.add_argument(
+            "--maintenance-work-mem",
+            default="2GB",
+            help="maintenance_work_mem used while rebuilding indexes (default: 2GB)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of processes formatting rows in parallel (default: 1). "
+                "Rows are still written by this process in a single transaction."
+            ),
+        )
+
+    def iter_payloads(self, batches, format_batch, workers):
+        """
+        Yield (row_count, payloads) for each batch, in order.
+
+        With more than one worker, batches are formatted in forked processes and at
+        most BATCHES_IN_FLIGHT_PER_WORKER batches per worker are in flight, so rows are
+        still generated lazily.
+        """
+        if workers <= 1:
+            for batch in batches:
+                yield len(batch), format_batch(batch)
+            return
+
+        # Fork so workers inherit the already configured process without re-importing Django
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            pending = collections.deque()
+            for batch in batches:
+                pending.append((len(batch), executor.submit(format_batch, batch)))
+                if len(pending) >= workers * BATCHES_IN_FLIGHT_PER_WORKER:
+                    row_count, future = pending.popleft()
+                    yield row_count, future.result()
+            while pending:
+                row_count, future = pending.popleft()
+                yield row_count, future.result()
+
+    def drop_trigram_indexes(self, cursor):
+        """Drop the Product GIN trigram indexes so COPY does not maintain them row by row."""
+        names = [index.name for index in Product._meta.indexes if isinstance(index, GinIndex)]
+        cursor.execute(
+            "DROP INDEX IF EXISTS " + ", ".join(connection.ops.quote_name(name) for name in names)
         )
 
+    def create_trigram_indexes(self, cursor, maintenance_work_mem):
+        """Recreate the Product GIN trigram indexes from their model definitions."""
+        # CREATE INDEX refuses to run while the deferred category FK checks queued by
+        # COPY are still pending in this transaction, so fire them now
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        # GIN builds are much faster when the whole index fits in maintenance_work_mem
+        cursor.execute("SELECT set_config('maintenance_work_mem', %s, true)", [maintenance_work_mem])
+        with connection.schema_editor() as schema_editor:
+            for index in Product._meta.indexes:
+                if isinstance(index, GinIndex):
+                    schema_editor.add_index(Product, index)
+
     def handle(self, *args, **options):
         """Execute the command."""
         count = options["count"]
         batch_size = options["batch_size"]
+        sql_batch_size = options["sql_batch_size"]
+        rebuild_indexes = options["rebuild_indexes"]
+        workers = options["workers"]
+        if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            raise CommandError("--workers greater than 1 requires the 'fork' start method.")
         fake_ar = Faker("ar_SA")  # Arabic locale
         fake_en = Faker("en_US")  # English locale
+        if options["seed"] is not None:
+            random.seed(options["seed"])
+            fake_ar.seed_instance(options["seed"])
+            fake_en.seed_instance(options["seed"])
         
         self.stdout.write(self.style.SUCCESS(f"Starting to create {count} products..."))
 
@@ -68,57 +336,56 @@ class Command(BaseCommand):
         english_products = ["Apple", "Banana", "Cheese", "Bread", "Chicken", "Orange", "Tomato", "Milk", "Rice", "Meat"]
         english_adjectives = ["Fresh", "Organic", "Red", "Green", "Natural", "Grilled", "Premium", "Local"]
 
-        # Track used names to ensure uniqueness
-        used_names = set(Product.objects.values_list('name', flat=True))
+        # Pre-generate Faker pools once; per-row Faker calls dominate generation time
+        words_ar, brands_ar, descriptions_ar = build_faker_pools(fake_ar, count)
+        words_en, brands_en, descriptions_en = build_faker_pools(fake_en, count)
+
+        arabic = (arabic_adjectives, arabic_products, words_ar, brands_ar, descriptions_ar)
+        english = (english_adjectives, english_products, words_en, brands_en, descriptions_en)
+
+        copy_sql = "COPY {table} ({columns}) FROM STDIN WITH (FORMAT TEXT)".format(
+            table=connection.ops.quote_name(Product._meta.db_table),
+            columns=", ".join(connection.ops.quote_name(column) for column in COPY_COLUMNS),
+        )
+        now = timezone.now().isoformat()
 
-        # Generate and insert products in batches
-        products = []
+        # Generate and insert products in batches; only the batches in flight are held.
+        # Sampling stays in this process, so formatting in the workers needs no randomness.
+        in_flight = workers * BATCHES_IN_FLIGHT_PER_WORKER if workers > 1 else 0
+        batches = generate_batches(
+            count,
+            batch_size,
+            arabic,
+            english,
+            [category.id for category in categories],
+            in_flight,
+        )
+        format_batch = functools.partial(format_copy_batch, now=now, sql_batch_size=sql_batch_size)
+        buffer = io.StringIO()  # Reused for every COPY statement
         total_inserted = 0
         
-        with transaction.atomic():  # Ensure data consistency
-            for i in tqdm(range(count), desc="Generating products"):
-                # Randomly choose language for the product name
-                is_arabic = random.choice([True, False])
-                
-                # Generate diverse and unique product name
-                attempts = 0
-                max_attempts = 10
-                while attempts < max_attempts:
-                    if is_arabic:
-                        product_name = f"{random.choice(arabic_adjectives)} {random.choice(arabic_products)} {fake_ar.word().capitalize()}"
-                    else:
-                        product_name = f"{random.choice(english_adjectives)} {random.choice(english_products)} {fake_en.word().capitalize()}"
-                    
-                    if product_name not in used_names:
-                        used_names.add(product_name)
-                        break
-                    attempts += 1
-                
-                # Fallback to basic name if uniqueness not achieved
-                if attempts >= max_attempts:
-                    product_name = f"{random.choice(arabic_adjectives)} {random.choice(arabic_products)}" if is_arabic else f"{random.choice(english_adjectives)} {random.choice(english_products)}"
-                
-                # Generate brand and description
-                brand = fake_ar.company() if is_arabic else fake_en.company()
-                description = fake_ar.sentence(nb_words=10) if is_arabic else fake_en.sentence(nb_words=10)
-                
-                # Create product instance
-                product = Product(
-                    name=product_name,
-                    brand=brand,
-                    description=description,
-                    calories=random.randint(10, 500),
-                    category=random.choice(categories),
-                )
-                products.append(product)
-                
-                # Insert batch when batch_size is reached
-                if len(products) >= batch_size or i == count - 1:
-                    Product.objects.bulk_create(products, batch_size=batch_size)
-                    total_inserted += len(products)
-                    products = []  # Clear the list for the next batch
+        with transaction.atomic(), connection.cursor() as cursor:  # Ensure data consistency
+            # Test data can be regenerated, so skip waiting for the WAL flush on commit
+            cursor.execute("SET LOCAL synchronous_commit = OFF")
+            if rebuild_indexes:
+                self.drop_trigram_indexes(cursor)
+
+            with tqdm(total=count, desc="Generating products", mininterval=0.5) as progress:
+                for row_count, payloads in self.iter_payloads(batches, format_batch, workers):
+                    for payload in payloads:
+                        buffer.seek(0)
+                        buffer.truncate()
+                        buffer.write(payload)
+                        buffer.seek(0)
+                        cursor.copy_expert(copy_sql, buffer)
+                    total_inserted += row_count
+                    progress.update(row_count)  # One progress update per batch, not per row
                     self.stdout.write(
                         self.style.SUCCESS(f"Inserted {total_inserted} products so far...")
                     )
 
+            if rebuild_indexes:
+                self.stdout.write(self.style.SUCCESS("Rebuilding trigram indexes..."))
+                self.create_trigram_indexes(cursor, options["maintenance_work_mem"])
+
         self.stdout.write(self.style.SUCCESS(f"Successfully created {count} products!"))
\ No newline at end of file
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+# Earlier populate_products runs could store the same name twice. Keep the oldest
+# row's name and append the id to every later duplicate so the unique index builds.
+DEDUPLICATE_PRODUCT_NAMES = """
+UPDATE products_product AS product
+SET name = left(product.name, 200 - length(' (' || product.id || ')'))
+    || ' (' || product.id || ')'
+WHERE EXISTS (
+    SELECT 1 FROM products_product AS older
+    WHERE older.name = product.name AND older.id < product.id
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_alter_product_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=DEDUPLICATE_PRODUCT_NAMES,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='name',
+            field=models.CharField(max_length=200, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('products', '0005_alter_product_name'),
+    ]
+
+    operations = [
+        # The composite name/brand trigram index was declared on the model but never
+        # added by a migration; drop it wherever it was created outside of migrations.
+        # Single-column trigram indexes on name and brand already serve every search.
+        migrations.RunSQL(
+            sql="DROP INDEX IF EXISTS product_name_brand_trgm_idx;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
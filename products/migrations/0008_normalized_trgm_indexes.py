@@ -0,0 +1,52 @@
+import django.contrib.postgres.indexes
+from django.db import migrations
+import products.models
+
+
+# Mirrors views.normalize_arabic: NFKD splits 'أ', 'إ' and 'آ' into 'ا' plus a
+# combining mark (U+0653-U+0655); translate() maps 'ة' to 'ه' and, having no
+# counterpart for them, deletes those marks. IMMUTABLE so it can back expression
+# indexes.
+CREATE_NORMALIZE_ARABIC = r"""
+CREATE OR REPLACE FUNCTION normalize_arabic(text) RETURNS text
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$ SELECT translate(normalize($1, NFKD), U&'\0629\0653\0654\0655', U&'\0647') $$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_remove_category_category_name_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=CREATE_NORMALIZE_ARABIC,
+            reverse_sql="DROP FUNCTION IF EXISTS normalize_arabic(text);",
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_name_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_brand_trgm_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_description_trgm_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(products.models.NormalizeArabic('name'), name='gin_trgm_ops'), name='product_name_norm_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(products.models.NormalizeArabic('brand'), name='gin_trgm_ops'), name='product_brand_norm_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(products.models.NormalizeArabic('description'), name='gin_trgm_ops'), name='product_desc_norm_trgm'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+import products.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_prefix_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_name_upper_prefix',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_brand_upper_prefix',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(products.models.NormalizeArabic('name')), name='text_pattern_ops'), name='product_name_norm_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(products.models.NormalizeArabic('brand')), name='text_pattern_ops'), name='product_brand_norm_prefix'),
+        ),
+    ]
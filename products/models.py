@@ -5,11 +5,25 @@ This module defines the Category and Product models with trigram indexes
 for efficient search and composite indexes for optimized filtering.
 """
 
+import re
+
 from django.db import models
-from django.contrib.postgres.indexes import GinIndex
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.utils.text import slugify
 
 
+class NormalizeArabic(models.Func):
+    """
+    SQL counterpart of views.normalize_arabic (NFKD, then unify alef/taa marbuta forms).
+
+    Backed by the IMMUTABLE normalize_arabic(text) function created in migration 0008,
+    so it can be used in expression indexes and matched by search queries.
+    """
+    function = "normalize_arabic"
+    output_field = models.TextField()
+
+
 class Category(models.Model):
     """
     Represents a product category (e.g., Fruits, Proteins) for organizing products.
@@ -31,22 +45,28 @@ class Category(models.Model):
         verbose_name = "Category"
         verbose_name_plural = "Categories"
         ordering = ["name"]
-        indexes = [
-            GinIndex(fields=["name"], name="category_name_trgm_idx", opclasses=["gin_trgm_ops"]),
-        ]
 
     def save(self, *args, **kwargs):
         """
         Automatically generate a unique slug based on the category name.
+
+        Existing "<slug>" and "<slug>-<n>" values are fetched in a single query and
+        the next free counter is picked, instead of probing one suffix per query.
         """
         if not self.slug:
             base_slug = slugify(self.name)
-            slug = base_slug
-            counter = 1
-            while Category.objects.filter(slug=slug).exclude(id=self.id).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            taken = set(
+                Category.objects.filter(slug__regex=rf"^{re.escape(base_slug)}(-[0-9]+)?$")
+                .exclude(id=self.id)
+                .values_list("slug", flat=True)
+            )
+            if base_slug not in taken:
+                self.slug = base_slug
+            else:
+                counters = (
+                    int(slug.rsplit("-", 1)[1]) for slug in taken if slug != base_slug
+                )
+                self.slug = f"{base_slug}-{max(counters, default=0) + 1}"
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -59,7 +79,7 @@ class Product(models.Model):
     and full-text search capabilities.
 
     Attributes:
-        name (CharField): The name of the product (e.g., "Apple").
+        name (CharField): The unique name of the product (e.g., "Apple").
         brand (CharField): The brand of the product (e.g., "Organic").
         category (ForeignKey): The category to which the product belongs.
         description (TextField): Detailed description of the product.
@@ -70,7 +90,7 @@ class Product(models.Model):
         created_at (DateTimeField): Timestamp when the product was created.
         updated_at (DateTimeField): Timestamp when the product was last updated.
     """
-    name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200, unique=True)
     brand = models.CharField(max_length=100)
     category = models.ForeignKey(
         Category, on_delete=models.CASCADE, related_name="products"
@@ -88,18 +108,32 @@ class Product(models.Model):
         verbose_name_plural = "Products"
         ordering = ["id"]
         indexes = [
-            GinIndex(
-                fields=["name", "brand"],
-                name="product_name_brand_trgm_idx",
-                opclasses=["gin_trgm_ops", "gin_trgm_ops"]
-            ),
             models.Index(
                 fields=["category", "calories"],
                 name="product_category_calories_idx"
             ),
-            GinIndex(fields=["name"], name="product_name_trgm_idx", opclasses=["gin_trgm_ops"]),
-            GinIndex(fields=["brand"], name="product_brand_trgm_idx", opclasses=["gin_trgm_ops"]),
-            GinIndex(fields=["description"], name="product_description_trgm_idx", opclasses=["gin_trgm_ops"]),
+            # Serve the normalized prefix matches of short searches
+            # (UPPER(normalize_arabic(col)) LIKE 'Q%')
+            models.Index(
+                OpClass(Upper(NormalizeArabic("name")), name="text_pattern_ops"),
+                name="product_name_norm_prefix",
+            ),
+            models.Index(
+                OpClass(Upper(NormalizeArabic("brand")), name="text_pattern_ops"),
+                name="product_brand_norm_prefix",
+            ),
+            GinIndex(
+                OpClass(NormalizeArabic("name"), name="gin_trgm_ops"),
+                name="product_name_norm_trgm",
+            ),
+            GinIndex(
+                OpClass(NormalizeArabic("brand"), name="gin_trgm_ops"),
+                name="product_brand_norm_trgm",
+            ),
+            GinIndex(
+                OpClass(NormalizeArabic("description"), name="gin_trgm_ops"),
+                name="product_desc_norm_trgm",
+            ),
         ]
 
     def __str__(self):
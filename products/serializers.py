@@ -1,7 +1,31 @@
+from functools import lru_cache
+from django.db import connection
 from rest_framework import serializers
 from .models import Product, Category
 from django.utils.text import slugify
 
+# Returns the category with the given slug, creating it first if it does not exist,
+# in a single round-trip. Only used after a plain lookup missed: every ON CONFLICT
+# DO NOTHING still draws a value from the id sequence, even when no row is inserted.
+UPSERT_CATEGORY_SQL = """
+    WITH inserted AS (
+        INSERT INTO {table} (name, slug, description, created_at, updated_at)
+        VALUES (%s, %s, %s, NOW(), NOW())
+        ON CONFLICT (slug) DO NOTHING
+        RETURNING *
+    )
+    SELECT * FROM inserted
+    UNION ALL
+    SELECT * FROM {table} WHERE slug = %s
+    LIMIT 1
+"""
+
+
+@lru_cache(maxsize=1024)
+def cached_slugify(value):
+    """Memoized slugify; category names repeat heavily across product writes."""
+    return slugify(value)
+
 
 class CategorySerializer(serializers.ModelSerializer):
     """
@@ -55,11 +79,20 @@ class ProductSerializer(serializers.ModelSerializer):
         """
         if not value:
             raise serializers.ValidationError("Category name cannot be empty.")
-        category, created = Category.objects.get_or_create(
-            slug=slugify(value),
-            defaults={"name": value, "description": f"{value} category"}
+        slug = cached_slugify(value)
+        category = Category.objects.filter(slug=slug).first()
+        if category is not None:
+            return category
+        upsert_sql = UPSERT_CATEGORY_SQL.format(
+            table=connection.ops.quote_name(Category._meta.db_table)
         )
-        return category
+        categories = list(Category.objects.raw(
+            upsert_sql, [value, slug, f"{value} category", slug]
+        ))
+        if categories:
+            return categories[0]
+        # A concurrent request inserted the slug after this statement's snapshot was taken
+        return Category.objects.get(slug=slug)
 
     def create(self, validated_data):
         """
@@ -85,8 +118,27 @@ class ProductSerializer(serializers.ModelSerializer):
 class ProductSearchSerializer(ProductSerializer):
     """
     Specialized serializer for product search results.
-    Currently identical to ProductSerializer but separated for future flexibility.
+    Adds the search rank and leaves out the description, which the search
+    queryset defers.
     """
     rank = serializers.FloatField(read_only=True)
     class Meta(ProductSerializer.Meta):
-        fields = ProductSerializer.Meta.fields + ["rank"]
+        fields = [
+            field for field in ProductSerializer.Meta.fields if field != "description"
+        ] + ["rank"]
+
+
+class SearchParamsSerializer(serializers.Serializer):
+    """
+    Parses the query parameters of the product search endpoint in one pass.
+
+    Fields:
+        q (str): Search text, stripped of surrounding whitespace.
+        category (str): Optional category name filter.
+        calories_min (float): Optional lower calories bound.
+        calories_max (float): Optional upper calories bound.
+    """
+    q = serializers.CharField(required=False, allow_blank=True, default="")
+    category = serializers.CharField(required=False, allow_blank=True)
+    calories_min = serializers.FloatField(required=False)
+    calories_max = serializers.FloatField(required=False)
@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.core.management import call_command
+from django.db import connection
 from products.models import Category, Product
 import pytest
 
@@ -12,4 +13,33 @@ class PopulateProductsCommandTests(TestCase):
         # Verify that categories are created
         self.assertGreater(Category.objects.count(), 0)
         # Verify that products are created
-        self.assertGreater(Product.objects.count(), 0)
\ No newline at end of file
+        self.assertGreater(Product.objects.count(), 0)
+
+    def test_populate_products_generates_unique_names(self):
+        """Test that generated product names do not repeat."""
+        call_command('populate_products', count=200)
+        names = list(Product.objects.values_list('name', flat=True))
+        self.assertEqual(len(names), len(set(names)))
+
+
+    def test_populate_products_rebuild_indexes(self):
+        """Test that --rebuild-indexes recreates the trigram indexes after loading."""
+        call_command('populate_products', count=50, rebuild_indexes=True)
+        self.assertEqual(Product.objects.count(), 50)
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Product._meta.db_table)
+        self.assertIn("product_name_norm_trgm", constraints)
+
+
+    def test_populate_products_with_workers(self):
+        """Test that rows formatted in worker processes are all inserted."""
+        call_command('populate_products', count=60, batch_size=20, workers=2)
+        self.assertEqual(Product.objects.count(), 60)
+
+
+    def test_populate_products_unique_names_across_batches(self):
+        """Test that names stay unique across many batches formatted in parallel."""
+        call_command('populate_products', count=400, batch_size=10, workers=2, seed=7)
+        names = list(Product.objects.values_list('name', flat=True))
+        self.assertEqual(len(names), 400)
+        self.assertEqual(len(names), len(set(names)))
@@ -30,6 +30,16 @@ class CategoryModelTests(TestCase):
         with self.assertRaises(IntegrityError):
             Category.objects.create(name=name)
 
+    def test_category_slug_gets_numeric_suffix(self):
+        """Test that categories whose names slugify the same get numbered slugs."""
+        first = Category.objects.create(name="Fresh Fruits")
+        second = Category.objects.create(name="Fresh-Fruits")
+        third = Category.objects.create(name="Fresh Fruits!")
+        self.assertEqual(
+            [first.slug, second.slug, third.slug],
+            ["fresh-fruits", "fresh-fruits-1", "fresh-fruits-2"],
+        )
+
 
 @pytest.mark.django_db
 class ProductModelTests(TestCase):
@@ -1,7 +1,9 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from rest_framework.exceptions import ValidationError
 from products.models import Category, Product
-from products.serializers import CategorySerializer, ProductSerializer, ProductSearchSerializer
+from products.serializers import (
+    CategorySerializer, ProductSerializer, ProductSearchSerializer, SearchParamsSerializer
+)
 import pytest
 
 @pytest.mark.django_db
@@ -106,3 +108,18 @@ class ProductSearchSerializerTests(TestCase):
         """Test serializing a product with rank for search results."""
         serializer = ProductSearchSerializer(self.product, context={"rank": 0.95})
         self.assertEqual(serializer.data["name"], "Apple")
+        self.assertNotIn("description", serializer.data)
+
+
+class SearchParamsSerializerTests(SimpleTestCase):
+    def test_parse_search_params(self):
+        """Test that the query is stripped and calorie bounds become floats."""
+        serializer = SearchParamsSerializer(data={"q": " Apple ", "calories_min": "50"})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, {"q": "Apple", "calories_min": 50.0})
+
+    def test_invalid_calories(self):
+        """Test that a non-numeric calorie bound is reported as an error."""
+        serializer = SearchParamsSerializer(data={"q": "Apple", "calories_max": "invalid"})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("calories_max", serializer.errors)
@@ -1,46 +1,96 @@
-from django.test import TestCase
+import hashlib
+import json
+import uuid
+from django.test import SimpleTestCase, TestCase
 from rest_framework.test import APIClient
+from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
+from django_redis import get_redis_connection
 from products.models import Category, Product
 from products.views import normalize_arabic
 from django.contrib.auth.models import User
 import pytest
 
+
+class NormalizeArabicTests(SimpleTestCase):
+    def test_ascii_is_unchanged(self):
+        """Test that ASCII queries are returned as-is."""
+        self.assertEqual(normalize_arabic("Apple"), "Apple")
+
+    def test_taa_marbuta_is_replaced(self):
+        """Test that 'ة' is normalized to 'ه'."""
+        self.assertEqual(normalize_arabic("تفاحة"), "تفاحه")
+
+    def test_hamza_alef_is_folded(self):
+        """Test that alef with hamza or madda is folded to a bare alef."""
+        self.assertEqual(normalize_arabic("تفإح"), "تفاح")
+        self.assertEqual(normalize_arabic("أمن آمن"), "امن امن")
+
+
+@pytest.mark.django_db
+class NormalizeArabicSQLTests(TestCase):
+    def test_sql_function_matches_python(self):
+        """Test that the normalize_arabic() SQL function matches the Python helper."""
+        words = ["Apple", "تفاحة", "تفإح", "أمن آمن", "مؤمن"]
+        with connection.cursor() as cursor:
+            for word in words:
+                cursor.execute("SELECT normalize_arabic(%s)", [word])
+                self.assertEqual(cursor.fetchone()[0], normalize_arabic(word))
+
+
 @pytest.mark.django_db
 class ProductViewSetTests(TestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.user = User.objects.create_user(username='testuser', password='testpass')
-        self.category = Category.objects.create(name="Fruits", slug="fruits")
-        self.product = Product.objects.create(
-            name="Apple", brand="Organic", category=self.category, calories=52
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass')
+        cls.category = Category.objects.create(name="Fruits", slug="fruits")
+        cls.product = Product.objects.create(
+            name="Apple", brand="Organic", category=cls.category, calories=52
         )
-        # Obtain JWT token
-        response = self.client.post(
+        # Obtain JWT token once for the whole class
+        response = APIClient().post(
             '/api/token/',
             {'username': 'testuser', 'password': 'testpass'},
             format='json'
         )
-        self.access_token = response.data['access']
+        cls.access_token = response.data['access']
+
+    def setUp(self):
+        self.client = APIClient()
 
     def test_list_products(self):
         """Test listing all products with caching."""
         response = self.client.get("/api/products/")
         self.assertEqual(response.status_code, 200)
-        self.assertTrue("results" in response.data)
-        self.assertTrue(len(response.data["results"]) > 0)
+        self.assertTrue("results" in response.json())
+        self.assertTrue(len(response.json()["results"]) > 0)
         cached_data = cache.get("products:all:page:1")
         self.assertIsNotNone(cached_data)
-        self.assertEqual(cached_data, response.data)
+        self.assertEqual(json.loads(cached_data), response.json())
+
+    def test_list_products_cache_hit(self):
+        """Test that a cached page is served as the same JSON."""
+        first = self.client.get("/api/products/")
+        second = self.client.get("/api/products/")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second["Content-Type"], "application/json")
+        self.assertEqual(second.json(), first.json())
 
     def test_retrieve_product(self):
         """Test retrieving a single product with caching."""
         response = self.client.get(f"/api/products/{self.product.id}/")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.data["name"], "Apple")
+        self.assertEqual(response.json()["name"], "Apple")
         cached_data = cache.get(f"products:{self.product.id}")
         self.assertIsNotNone(cached_data)
 
+    def test_retrieve_missing_product(self):
+        """Test that a missing product returns 404 and is not cached."""
+        response = self.client.get("/api/products/999999/")
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(cache.get("products:999999"))
+
     def test_create_product(self):
         """Test creating a product with JWT authentication and cache invalidation."""
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
@@ -55,6 +105,25 @@ class ProductViewSetTests(TestCase):
         self.assertEqual(response.data["name"], "Banana")
         self.assertIsNone(cache.get("products:all"))
 
+    def test_create_product_clears_cached_pages(self):
+        """Test that creating a product drops the cached product list pages."""
+        self.client.get("/api/products/")
+        self.assertIsNotNone(cache.get("products:all:page:1"))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        data = {"name": "Banana", "brand": "Organic", "category": "Fruits", "calories": 89}
+        response = self.client.post("/api/products/", data)
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(cache.get("products:all:page:1"))
+
+    def test_update_product_clears_cached_detail(self):
+        """Test that updating a product drops its cached detail response."""
+        self.client.get(f"/api/products/{self.product.id}/")
+        self.assertIsNotNone(cache.get(f"products:{self.product.id}"))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        response = self.client.patch(f"/api/products/{self.product.id}/", {"calories": 53})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(f"products:{self.product.id}"))
+
     def test_search_products(self):
         """Test searching products by name."""
         response = self.client.get("/api/products/search/?q=Apple")
@@ -62,6 +131,82 @@ class ProductViewSetTests(TestCase):
         self.assertTrue("results" in response.data)
         self.assertTrue(len(response.data["results"]) > 0)
 
+    def test_search_results_omit_description(self):
+        """Test that search results carry the rank but not the description."""
+        response = self.client.get("/api/products/search/?q=Apple")
+        result = response.data["results"][0]
+        self.assertIn("rank", result)
+        self.assertNotIn("description", result)
+
+    def test_search_count_refreshed_after_create(self):
+        """Test that the cached search count is cleared when a product is added."""
+        response = self.client.get("/api/products/search/?q=Apple")
+        self.assertEqual(response.data["count"], 1)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        data = {"name": "Apple Pie", "brand": "Organic", "category": "Fruits", "calories": 237}
+        self.assertEqual(self.client.post("/api/products/", data).status_code, 201)
+        response = self.client.get("/api/products/search/?q=Apple")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_trigram_threshold_is_set(self):
+        """Test that connections use the search word similarity threshold."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting('pg_trgm.word_similarity_threshold')")
+            self.assertEqual(
+                float(cursor.fetchone()[0]), settings.SEARCH_WORD_SIMILARITY_THRESHOLD
+            )
+
+    def test_search_matches_category_name(self):
+        """Test that a product is found and ranked through its category name alone."""
+        response = self.client.get("/api/products/search/?q=Fruits")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["name"], "Apple")
+        self.assertAlmostEqual(response.data["results"][0]["rank"], 0.8, places=5)
+
+    def test_search_misspelling_in_longer_name(self):
+        """Test that a misspelling matches a longer name through the weighted rank."""
+        Product.objects.create(
+            name="Natural Apple Development", brand="Chavez", category=self.category
+        )
+        response = self.client.get("/api/products/search/?q=Aple")
+        self.assertEqual(response.status_code, 200)
+        names = [product["name"] for product in response.data["results"]]
+        self.assertIn("Natural Apple Development", names)
+
+    def test_search_count_registry_expires(self):
+        """Test that the registry of cached search counts expires with its members."""
+        redis = get_redis_connection("default")
+        # A query unique to this run, so no count cached by an earlier run is hit
+        query = f"Apple {uuid.uuid4().hex}"
+        count_params = json.dumps([query, None, None, None])
+        count_key = cache.make_key(
+            f"search:count:{hashlib.sha1(count_params.encode()).hexdigest()}"
+        )
+        self.addCleanup(redis.srem, "search_keys", count_key)
+        self.addCleanup(redis.delete, count_key)
+        self.client.get("/api/products/search/", {"q": query})
+        self.assertTrue(redis.sismember("search_keys", count_key))
+        self.assertGreater(redis.ttl("search_keys"), 0)
+
+    def test_search_short_query(self):
+        """Test that a two-character query matches products by prefix."""
+        # Shares only the "  a" trigram with "ap", which plain `%` would accept
+        Product.objects.create(
+            name="Organic Banana Aut", brand="Organic", category=self.category
+        )
+        response = self.client.get("/api/products/search/?q=Ap")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "Apple")
+
+    def test_search_short_query_normalizes_prefix(self):
+        """Test that a short Arabic query matches hamza forms as a prefix."""
+        Product.objects.create(name="Milk", brand="أحمد", category=self.category)
+        response = self.client.get("/api/products/search/", {"q": "أح"})
+        self.assertEqual(response.status_code, 200)
+        names = [product["name"] for product in response.data["results"]]
+        self.assertEqual(names, ["Milk"])
+
     def test_search_with_filters(self):
         """Test searching with category and calories filters."""
         response = self.client.get(
@@ -95,17 +240,20 @@ class ProductViewSetTests(TestCase):
 
 @pytest.mark.django_db
 class CategoryViewSetTests(TestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.user = User.objects.create_user(username='testuser', password='testpass')
-        self.category = Category.objects.create(name="Fruits", slug="fruits")
-        # Obtain JWT token
-        response = self.client.post(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass')
+        cls.category = Category.objects.create(name="Fruits", slug="fruits")
+        # Obtain JWT token once for the whole class
+        response = APIClient().post(
             '/api/token/',
             {'username': 'testuser', 'password': 'testpass'},
             format='json'
         )
-        self.access_token = response.data['access']
+        cls.access_token = response.data['access']
+
+    def setUp(self):
+        self.client = APIClient()
 
     def test_list_categories(self):
         """Test listing all categories."""
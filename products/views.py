@@ -1,40 +1,207 @@
+import hashlib
+import json
 import logging
 import unicodedata
-from django.db.models import Q, Value, BooleanField, Case, When
+import uuid
+from functools import lru_cache
+from django.db.models import F, Q, Value, BooleanField, Case, FloatField, When
+from django.db.models.functions import Upper
+from django.contrib.postgres.lookups import TrigramWordSimilar
 from django.contrib.postgres.search import TrigramSimilarity
 from rest_framework import viewsets
 from rest_framework.decorators import action, permission_classes
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.utils.functional import cached_property
 from django_redis import get_redis_connection
-from .models import Product, Category
-from .serializers import ProductSerializer, ProductSearchSerializer, CategorySerializer
+from redis.exceptions import ResponseError
+from .models import Product, Category, NormalizeArabic
+from .serializers import (
+    ProductSerializer, ProductSearchSerializer, CategorySerializer, SearchParamsSerializer
+)
 
 # Logger setup
 logger = logging.getLogger(__name__)
 
 
+# Applied after NFKD, which splits 'أ', 'إ' and 'آ' into 'ا' plus a combining
+# hamza/madda (U+0653-U+0655); dropping those marks leaves the bare alef.
+# Built once at import time; str.translate applies every replacement in a single pass
+_ARABIC_TABLE = str.maketrans({'\u0653': None, '\u0654': None, '\u0655': None, 'ة': 'ه'})
+
+
+@lru_cache(maxsize=8192)
+def _normalize_non_ascii(text):
+    """
+    Memoized NFKD + Arabic table pass; search queries repeat across pages and
+    autocomplete keystrokes.
+    """
+    if not unicodedata.is_normalized('NFKD', text):
+        # The quick check avoids building a copy of text that is already in form
+        text = unicodedata.normalize('NFKD', text)
+    return text.translate(_ARABIC_TABLE)
+
+
 def normalize_arabic(text):
     """
     Normalize Arabic characters for unified search matching 
     (e.g., replace 'أ', 'إ', 'آ' with 'ا', and 'ة' with 'ه').
     """
-    text = unicodedata.normalize('NFKD', text)
-    replacements = {'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ة': 'ه'}
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-    return text
+    if text.isascii():
+        # Neither NFKD nor the Arabic table changes ASCII text, so it never
+        # takes a slot in the cache
+        return text
+    return _normalize_non_ascii(text)
+
+
+# Shared renderer for the JSON bytes stored in the cache
+_json_renderer = JSONRenderer()
+
+# Redis set holding the full keys of every cached product list page
+PRODUCT_LIST_KEYS = "products:all:keys"
+
+# Redis set holding the full keys of every cached search count
+SEARCH_KEYS = "search_keys"
+
+# Members fetched per SSCAN call and keys passed to each UNLINK
+KEY_SET_BATCH_SIZE = 1000
+
+# Seconds a registry renamed for draining is kept if the drain is interrupted;
+# none of the keys it registers outlives this
+DRAINING_TIMEOUT = 600
+
+
+def unlink_key_sets(redis, set_names, keys=()):
+    """
+    UNLINK `keys` and every key registered in the Redis sets `set_names`, then
+    the sets themselves.
+
+    Each set is first RENAMEd to a private name, which is atomic: a key registered
+    while the members are being read goes into a fresh set for the next
+    invalidation instead of being dropped with the old one. The RENAMEs, the
+    UNLINK of `keys` and the first SSCAN of every set share one non-transactional
+    pipeline; each following pipeline UNLINKs the members read so far and carries
+    on the scans. Sets of up to KEY_SET_BATCH_SIZE members are therefore drained
+    in two round-trips, and a large set never blocks Redis. Returns the number of
+    keys registered in each set, in order.
+    """
+    suffix = uuid.uuid4().hex
+    draining = [f"{name}:draining:{suffix}" for name in set_names]
+    pipe = redis.pipeline(transaction=False)
+    for name, renamed in zip(set_names, draining):
+        pipe.rename(name, renamed)
+        pipe.expire(renamed, DRAINING_TIMEOUT)
+    if keys:
+        pipe.unlink(*keys)
+    for renamed in draining:
+        pipe.sscan(renamed, 0, count=KEY_SET_BATCH_SIZE)
+    results = pipe.execute(raise_on_error=False)
+    for result in results:
+        # RENAME fails with "no such key" when nothing is registered in a set
+        if isinstance(result, ResponseError) and "no such key" not in str(result):
+            raise result
+
+    counts = dict.fromkeys(draining, 0)
+    scans = dict(zip(draining, results[len(results) - len(draining):]))
+    while scans:
+        pipe = redis.pipeline(transaction=False)
+        cursors = {}
+        for renamed, (cursor, members) in scans.items():
+            counts[renamed] += len(members)
+            if cursor:
+                cursors[renamed] = cursor
+                if members:
+                    pipe.unlink(*members)
+            elif members:
+                pipe.unlink(*members, renamed)
+        for renamed, cursor in cursors.items():
+            pipe.sscan(renamed, cursor, count=KEY_SET_BATCH_SIZE)
+        # An empty pipeline returns without a round-trip
+        results = pipe.execute()
+        scans = dict(zip(cursors, results[len(results) - len(cursors):]))
+    return [counts[renamed] for renamed in draining]
+
+
+def _pipelined_cache_set(key, value, timeout, registry=None, registry_ttl=None):
+    """
+    cache.set() `key` and add its full key to the Redis set `registry`, when given,
+    in one non-transactional pipeline (one round-trip). With `registry_ttl` the
+    set's TTL is pushed out in the same pipeline.
+    """
+    pipe = get_redis_connection("default").pipeline(transaction=False)
+    # Queued on the pipeline, with the key and encoding cache.get() reads back
+    cache.set(key, value, timeout, client=pipe)
+    if registry:
+        pipe.sadd(registry, cache.make_key(key))
+        if registry_ttl:
+            pipe.expire(registry, registry_ttl)
+    pipe.execute()
+
+
+# Cache key of the total product count shown on list pages
+PRODUCT_COUNT_KEY = "products:count:all"
+
+# Seconds a cached COUNT(*) is reused across pages
+COUNT_CACHE_TIMEOUT = 60
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that reuses a cached COUNT(*) when a count cache key is given.
+
+    The full key is added to the Redis set `count_registry`, when given, the first
+    time the count is stored. The set's TTL is pushed out to COUNT_CACHE_TIMEOUT in
+    the same pipeline: every member expires by then anyway, so the set cannot grow
+    without bound under read-only traffic.
+    """
+
+    def __init__(self, *args, count_cache_key=None, count_registry=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_cache_key = count_cache_key
+        self.count_registry = count_registry
+
+    @cached_property
+    def count(self):
+        if self.count_cache_key is None:
+            return super().count
+        count = cache.get(self.count_cache_key)
+        if count is None:
+            count = super().count
+            _pipelined_cache_set(
+                self.count_cache_key,
+                count,
+                COUNT_CACHE_TIMEOUT,
+                registry=self.count_registry,
+                registry_ttl=COUNT_CACHE_TIMEOUT,
+            )
+        return count
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     """
     Custom pagination class for consistent results pagination.
+
+    Views may set `count_cache_key` (and optionally `count_registry`) before
+    paginating so the total count is served from the cache between pages.
     """
     page_size = 30
     page_size_query_param = 'page_size'
     max_page_size = 1000
+    count_cache_key = None
+    count_registry = None
+
+    def django_paginator_class(self, queryset, page_size):
+        return CachedCountPaginator(
+            queryset,
+            page_size,
+            count_cache_key=self.count_cache_key,
+            count_registry=self.count_registry,
+        )
 
 
 class ProductViewSet(viewsets.ModelViewSet):
@@ -62,35 +229,51 @@ class ProductViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAuthenticated()]
 
-    def list(self, request, *args, **kwargs):
+    def _cached_json_response(self, cache_key, build_data, registry=None):
         """
-        List products with caching support.
+        Serve `cache_key` straight from Redis, or render build_data() to JSON once,
+        cache those bytes and return them. The cache key is added to the Redis set
+        `registry` when given.
+
+        On a miss the payload SET and the registry SADD go out in one pipeline, so
+        the miss path costs a GET plus a single write round-trip.
         """
-        page_number = request.query_params.get('page', '1')
-        cache_key = f"products:all:page:{page_number}"
         cached_response = cache.get(cache_key)
         if cached_response:
             logger.debug(f"[CACHE HIT] {cache_key}")
-            return Response(cached_response)
+            return HttpResponse(cached_response, content_type='application/json')
+
+        rendered = _json_renderer.render(build_data())
+        _pipelined_cache_set(cache_key, rendered, 600, registry=registry)
+        return HttpResponse(rendered, content_type='application/json')
+
+    def list(self, request, *args, **kwargs):
+        """
+        List products with caching support.
+        """
+        def build_page():
+            self.paginator.count_cache_key = PRODUCT_COUNT_KEY
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data).data
+            return self.get_serializer(queryset, many=True).data
 
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=600)
-        return response
+        page_number = request.query_params.get('page', '1')
+        # Registered so invalidation never has to scan the keyspace
+        return self._cached_json_response(
+            f"products:all:page:{page_number}", build_page, registry=PRODUCT_LIST_KEYS
+        )
 
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a single product with caching support.
         """
         product_id = kwargs.get('pk')
-        cache_key = f"products:{product_id}"
-        cached_response = cache.get(cache_key)
-        if cached_response:
-            logger.debug(f"[CACHE HIT] {cache_key}")
-            return Response(cached_response)
-
-        response = super().retrieve(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=600)
-        return response
+        return self._cached_json_response(
+            f"products:{product_id}", lambda: self.get_serializer(self.get_object()).data
+        )
 
     def perform_create(self, serializer):
         """
@@ -117,19 +300,24 @@ class ProductViewSet(viewsets.ModelViewSet):
     def invalidate_product_cache(self, product_id):
         """
         Clear product detail and product list caches.
+
+        The detail and count keys are UNLINKed in the same pipeline that starts
+        draining the list page and search registries.
         """
-        cache.delete_pattern("products:all:*")
-        cache.delete(f"products:{product_id}")
-        self.invalidate_all_search_cache()
+        _, search_keys = unlink_key_sets(
+            get_redis_connection("default"),
+            [PRODUCT_LIST_KEYS, SEARCH_KEYS],
+            keys=[cache.make_key(f"products:{product_id}"), cache.make_key(PRODUCT_COUNT_KEY)],
+        )
+        if search_keys:
+            logger.debug("[CACHE CLEARED] search:*")
 
     def invalidate_all_search_cache(self):
         """
         Clear all search-related keys stored in Redis.
         """
         redis = get_redis_connection("default")
-        keys = redis.smembers("search_keys")
-        if keys:
-            redis.delete(*keys, "search_keys")
+        if unlink_key_sets(redis, [SEARCH_KEYS])[0]:
             logger.debug("[CACHE CLEARED] search:*")
 
     def _search_queryset(self, query, category, calories_min, calories_max):
@@ -137,55 +325,118 @@ class ProductViewSet(viewsets.ModelViewSet):
         Search logic based on trigram similarity, category, and calorie filters.
         """
         query = normalize_arabic(query)
-        if category:
-            category = normalize_arabic(category)
-
-        queryset = Product.objects.select_related('category')
 
+        filters = {}
         if category:
-            queryset = queryset.filter(category__name__icontains=category)
-
-        if calories_min:
-            try:
-                queryset = queryset.filter(calories__gte=float(calories_min))
-            except ValueError:
-                logger.warning(f"Invalid calories_min value: {calories_min}")
-
-        if calories_max:
-            try:
-                queryset = queryset.filter(calories__lte=float(calories_max))
-            except ValueError:
-                logger.warning(f"Invalid calories_max value: {calories_max}")
+            # Resolved to literal ids, so the product filters never need the
+            # category join; see the candidate lookup below
+            filters['category_id__in'] = list(
+                Category.objects.filter(name__icontains=normalize_arabic(category))
+                .values_list('pk', flat=True)
+            )
+        if calories_min is not None:
+            filters['calories__gte'] = calories_min
+        if calories_max is not None:
+            filters['calories__lte'] = calories_max
+        queryset = Product.objects.filter(**filters)
 
         if len(query) <= 2:
-            queryset = queryset.filter(
-                Q(name__icontains=query) |
-                Q(brand__icontains=query) |
-                Q(description__icontains=query) |
-                Q(category__name__icontains=query)
+            # Prefix matches run on UPPER(normalize_arabic(col)), served by the
+            # text_pattern_ops indexes on that expression, so "أح" finds "أحمر" like
+            # the normalized trigram matches do; a leading-wildcard icontains could
+            # only be answered by a table scan. The word-similarity arm (`%>`) also
+            # finds names with a later word starting with the query; plain `%` would
+            # let a one- or two-letter query match on a single shared trigram. As in
+            # the similarity branch, categories are resolved to literal ids so every
+            # arm of the OR can feed a BitmapOr.
+            prefix = Upper(Value(query))
+            category_ids = list(
+                Category.objects.alias(name_prefix=Upper(NormalizeArabic('name')))
+                .filter(name_prefix__startswith=prefix)
+                .values_list('pk', flat=True)
+            )
+            queryset = queryset.alias(
+                name_norm=NormalizeArabic('name'),
+                name_prefix=Upper(NormalizeArabic('name')),
+                brand_prefix=Upper(NormalizeArabic('brand')),
+            ).filter(
+                Q(name_prefix__startswith=prefix) |
+                Q(brand_prefix__startswith=prefix) |
+                Q(name_norm__trigram_word_similar=query) |
+                Q(category_id__in=category_ids)
             ).annotate(
                 is_exact_name_match=Case(
-                    When(name__icontains=query, then=Value(True)),
+                    When(name_prefix__startswith=prefix, then=Value(True)),
                     default=Value(False),
                     output_field=BooleanField()
                 )
             ).order_by('-is_exact_name_match', 'name')
         else:
-            queryset = queryset.annotate(
+            # Compare against normalize_arabic() of each column, matching the
+            # expressions of the GIN trigram indexes, so "تفإح" and "تفاح" share
+            # trigrams. The word-similarity prefilter (`%>`) keeps rows where some
+            # word stretch of a column is close to the query, at the threshold set
+            # in settings.DATABASES. The GIN indexes can only prune on it because a
+            # row must share at least that fraction of the query's trigrams; a `%`
+            # threshold low enough to keep every row with rank > 0.2 is met by one
+            # shared trigram and prunes nothing. Matching categories are resolved
+            # to a literal id list first: a subquery arm inside the OR would be a
+            # SubPlan, which rules out a BitmapOr and forces a sequential scan,
+            # whereas `category_id IN (...)` is served by the category index.
+            # The category term of the rank only depends on the category, so it is
+            # scored once per category here instead of once per product row, and
+            # the product query needs no category join.
+            category_scores = list(
+                Category.objects.alias(name_norm=NormalizeArabic('name'))
+                .annotate(
+                    similarity=TrigramSimilarity('name_norm', query),
+                    is_match=TrigramWordSimilar(F('name_norm'), query),
+                )
+                .filter(similarity__gt=0)
+                .values_list('pk', 'similarity', 'is_match')
+            )
+            category_ids = [pk for pk, _, is_match in category_scores if is_match]
+            category_rank = Case(
+                *(
+                    When(category_id=pk, then=Value(similarity * 0.8))
+                    for pk, similarity, _ in category_scores
+                ),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            candidates = queryset.alias(
+                name_norm=NormalizeArabic('name'),
+                brand_norm=NormalizeArabic('brand'),
+                description_norm=NormalizeArabic('description'),
+            ).filter(
+                Q(name_norm__trigram_word_similar=query) |
+                Q(brand_norm__trigram_word_similar=query) |
+                Q(description_norm__trigram_word_similar=query) |
+                Q(category_id__in=category_ids)
+            ).values('pk')
+            # The candidate ids are found on the product table alone, and only the
+            # matching rows are ranked.
+            queryset = Product.objects.filter(pk__in=candidates).alias(
+                name_norm=NormalizeArabic('name'),
+                brand_norm=NormalizeArabic('brand'),
+                description_norm=NormalizeArabic('description'),
+            ).annotate(
                 rank=(
-                    TrigramSimilarity('name', query) * 2.0 +
-                    TrigramSimilarity('brand', query) * 1.0 +
-                    TrigramSimilarity('description', query) * 0.5 +
-                    TrigramSimilarity('category__name', query) * 0.8
+                    TrigramSimilarity('name_norm', query) * 2.0 +
+                    TrigramSimilarity('brand_norm', query) * 1.0 +
+                    TrigramSimilarity('description_norm', query) * 0.5 +
+                    category_rank
                 ),
                 is_exact_name_match=Case(
-                    When(name__icontains=query, then=Value(True)),
+                    When(name_norm__icontains=query, then=Value(True)),
                     default=Value(False),
                     output_field=BooleanField()
                 )
             ).filter(rank__gt=0.2).order_by('-is_exact_name_match', '-rank', 'name')
 
-        return queryset
+        # Descriptions are only matched against, never returned by ProductSearchSerializer;
+        # the category is write-only there, so it is not loaded either.
+        return queryset.defer('description')
 
     @action(detail=False, methods=['get'], url_path='search')
     @permission_classes([AllowAny])
@@ -193,10 +444,20 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         Search endpoint for querying products with TrigramSimilarity and filters.
         """
-        query = request.query_params.get('q', '').strip()
-        category = request.query_params.get('category')
-        calories_min = request.query_params.get('calories_min')
-        calories_max = request.query_params.get('calories_max')
+        params = SearchParamsSerializer(data=request.query_params)
+        if not params.is_valid():
+            # Invalid filters are ignored rather than failing the whole search
+            for field in params.errors:
+                logger.warning(f"Invalid {field} value: {request.query_params.get(field)}")
+            params = SearchParamsSerializer(data={
+                key: value for key, value in request.query_params.items()
+                if key not in params.errors
+            })
+            params.is_valid()
+        query = params.validated_data['q']
+        category = params.validated_data.get('category')
+        calories_min = params.validated_data.get('calories_min')
+        calories_max = params.validated_data.get('calories_max')
 
         if not query:
             return Response({
@@ -206,6 +467,13 @@ class ProductViewSet(viewsets.ModelViewSet):
                 "results": []
             })
 
+        # Pages of the same search share one cached count, cleared on product writes
+        count_params = json.dumps([query, category, calories_min, calories_max])
+        self.paginator.count_cache_key = (
+            f"search:count:{hashlib.sha1(count_params.encode()).hexdigest()}"
+        )
+        self.paginator.count_registry = SEARCH_KEYS
+
         queryset = self._search_queryset(query, category, calories_min, calories_max)
         page = self.paginate_queryset(queryset)
         if page is not None: